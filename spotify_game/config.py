@@ -5,14 +5,24 @@ from pathlib import Path
 # Spotify OAuth scopes needed for reading library and controlling playback.
 SCOPE = "user-library-read user-read-playback-state user-modify-playback-state"
 
-# Local file paths for auth token caching, library cache, and game history.
+# Local file paths for auth token caching, library cache, game history, and high score.
 TOKEN_CACHE_PATH = Path(".spotifycache")
 LEGACY_TOKEN_CACHE_PATH = Path(".cache")
 LIBRARY_CACHE_PATH = Path("library_data.json")
+COMPRESSED_LIBRARY_CACHE_PATH = LIBRARY_CACHE_PATH.with_suffix(".json.zst")
 GAME_HISTORY_PATH = Path("game_history.jsonl")
+HIGH_SCORE_PATH = GAME_HISTORY_PATH.with_suffix(".highscore.json")
+
+# Optional env var that seeds the per-game RNG for reproducible runs.
+GAME_SEED_ENV_VAR = "SPOTIFY_GAME_SEED"
 
 # Runtime tuning constants.
 SAVED_TRACKS_PAGE_SIZE = 50  # Spotify API max page size for saved tracks.
+LIBRARY_SYNC_WORKERS = 5  # Concurrent saved-track page requests per sync batch.
+LIBRARY_SYNC_BATCH_PAUSE_SECONDS = 0.1  # Pause between sync batches to stay under rate limits.
+TOKEN_REFRESH_SKEW_SECONDS = 120  # Refresh OAuth tokens this early, between rounds.
+LIBRARY_SYNC_TOKEN_SKEW_SECONDS = 600  # Token lifetime a library sync must have left before it starts.
 OPTION_COUNT = 4
+ROUND_PLAN_BATCH_SIZE = 32  # Rounds pre-sampled at a time; most runs end long before this.
 DEFAULT_SNIPPET_SECONDS = 15
 MAX_TERMINAL_WIDTH = 110
@@ -1,26 +1,24 @@
 """Environment-variable helpers and token-cache migration utilities."""
 
 import os
+import re
 from pathlib import Path
 
 from .config import LEGACY_TOKEN_CACHE_PATH, TOKEN_CACHE_PATH
 
+# One KEY=VALUE row per line; comment, blank, and '='-less rows never match.
+# Keys split at the first '=' so values containing '=' are preserved.
+ENV_LINE_PATTERN = re.compile(r"(?m)^[ \t]*([^#=\s][^=\n]*?)[ \t]*=(.*)$")
+
 
 def load_env_file(path: Path = Path(".env")) -> None:
     """Load simple KEY=VALUE pairs from a .env file into process env."""
     if not path.exists():
         return
 
-    with path.open("r", encoding="utf-8") as env_file:
-        for raw_line in env_file:
-            line = raw_line.strip()
-            # Skip comments, blank lines, and malformed rows.
-            if not line or line.startswith("#") or "=" not in line:
-                continue
-
-            # Split once so values containing '=' are preserved.
-            key, value = line.split("=", 1)
-            os.environ[key.strip()] = value.strip().strip("'\"")
+    text = path.read_text(encoding="utf-8")
+    for match in ENV_LINE_PATTERN.finditer(text):
+        os.environ[match.group(1)] = match.group(2).strip().strip("'\"")
 
 
 def get_required_env(name: str) -> str:
@@ -1,24 +1,30 @@
 """Core game loop: round orchestration, scoring, and run summaries."""
 
+import os
 import random
 import time
+from collections import deque
 from datetime import datetime, timezone
-from typing import Any
 
 import spotipy
 
-from .config import GAME_HISTORY_PATH, OPTION_COUNT
+from .config import GAME_HISTORY_PATH, GAME_SEED_ENV_VAR, OPTION_COUNT, ROUND_PLAN_BATCH_SIZE
 from .history import append_game_history, get_high_score
+from .library import Track
 from .playback import (
     FULL_SNIPPET_WINDOW_ERROR,
+    forget_transfer,
+    invalidate_device_cache,
     pause_playback,
     play_random_snippet,
     resolve_device,
 )
+from .spotify_client import ensure_fresh_token
 from .ui import (
     build_answer_prompt,
     build_option_lines,
     build_round_lines,
+    build_timer_line,
     enter_alternate_screen,
     get_terminal_width,
     leave_alternate_screen,
@@ -28,19 +34,32 @@ from .ui import (
 )
 
 
-def build_options(correct_track: dict[str, Any], library: list[dict[str, Any]]) -> list[dict[str, Any]]:
+def create_game_rng() -> random.Random:
+    """Create the per-game RNG, seeded from the environment when requested."""
+    seed = os.getenv(GAME_SEED_ENV_VAR)
+    return random.Random(seed) if seed else random.Random()
+
+
+def sample_round_indices(library_size: int, rng: random.Random) -> list[int]:
+    """Pick OPTION_COUNT distinct library indices; the first is the correct answer."""
+    return rng.sample(range(library_size), OPTION_COUNT)
+
+
+def plan_rounds(library_size: int, round_count: int, rng: random.Random) -> deque[list[int]]:
+    """Pre-sample index sets for a known number of rounds in one pass."""
+    return deque(sample_round_indices(library_size, rng) for _ in range(round_count))
+
+
+def build_options(round_indices: list[int], library: list[Track], rng: random.Random) -> list[Track]:
     """Build one shuffled answer set with 1 correct and N-1 alternatives."""
-    # Exclude the correct track from distractor candidates.
-    alternatives = [track for track in library if track["uri"] != correct_track["uri"]]
-    sampled = random.sample(alternatives, OPTION_COUNT - 1)
-    options = sampled + [correct_track]
-    random.shuffle(options)
+    options = [library[i] for i in round_indices]
+    rng.shuffle(options)
     return options
 
 
 def play_game(
     sp: spotipy.Spotify,
-    library: list[dict[str, Any]],
+    library: list[Track],
     snippet_seconds: int,
     max_rounds: int,
 ) -> None:
@@ -55,6 +74,15 @@ def play_game(
     if not device_id:
         raise RuntimeError("No available Spotify devices. Open Spotify on any device and try again.")
 
+    # One RNG drives every draw this game, so a seeded run replays identically.
+    rng = create_game_rng()
+
+    # Round draws are pre-sampled in small batches, refilled when the current batch runs out.
+    round_plan: deque[list[int]] = deque()
+
+    # Countdown values are bounded by the snippet length; format each one once per game.
+    timer_lines = tuple(build_timer_line(seconds) for seconds in range(snippet_seconds + 1))
+
     score = 0
     attempts = 0
     started_at = time.time()
@@ -63,6 +91,8 @@ def play_game(
     last_status = ""
     last_round_option_blocks: list[list[str]] = []
     last_round_option_count = OPTION_COUNT
+    last_round_width = get_terminal_width()
+    refresh_device = False
 
     try:
         try:
@@ -73,16 +103,24 @@ def play_game(
                     last_status = "limit"
                     break
 
-                # Re-resolve device each round to tolerate device changes.
-                device_id = resolve_device(sp, preferred_device_id=device_id)
-                if not device_id:
-                    end_message = "No available playback device found."
-                    last_status = "error"
-                    break
+                # Re-resolve the device only after a playback failure; it rarely changes mid-run.
+                if refresh_device:
+                    device_id = resolve_device(sp, preferred_device_id=device_id)
+                    if not device_id:
+                        end_message = "No available playback device found."
+                        last_status = "error"
+                        break
+
+                # Most runs end on the first miss, so never sample far past the current round.
+                if not round_plan:
+                    rounds_left = max_rounds - attempts if max_rounds else ROUND_PLAN_BATCH_SIZE
+                    round_plan = plan_rounds(len(library), min(ROUND_PLAN_BATCH_SIZE, rounds_left), rng)
 
                 # Build round candidates and pre-render the current screen.
-                current_track = random.choice(library)
-                options = build_options(current_track, library)
+                round_indices = round_plan.popleft()
+                current_track = library[round_indices[0]]
+                options = build_options(round_indices, library, rng)
+                # Width is resolved once per round and reused by every redraw.
                 terminal_width = get_terminal_width()
                 option_blocks = [
                     build_option_lines(index=i, track=track, width=terminal_width)
@@ -90,12 +128,14 @@ def play_game(
                 ]
                 last_round_option_blocks = option_blocks
                 last_round_option_count = len(options)
+                last_round_width = terminal_width
 
                 render_round_screen(
                     score=score,
                     remaining_seconds=snippet_seconds,
                     option_blocks=option_blocks,
                     option_count=len(options),
+                    width=terminal_width,
                     answer_buffer="",
                 )
 
@@ -106,19 +146,32 @@ def play_game(
                         option_blocks=option_blocks,
                         option_count=len(options),
                         remaining_seconds=remaining_seconds,
+                        timer_line=timer_lines[remaining_seconds],
                         answer_buffer=answer_buffer,
+                        width=terminal_width,
                     )
 
+                # Refresh a nearly expired token now rather than inside the playback calls.
+                ensure_fresh_token(sp)
+
                 # Start snippet playback and validate playback viability.
                 played, playback_error = play_random_snippet(
                     sp=sp,
                     track=current_track,
                     device_id=device_id,
                     snippet_seconds=snippet_seconds,
+                    rng=rng,
                 )
                 if not played:
                     if playback_error == FULL_SNIPPET_WINDOW_ERROR:
                         continue
+                    if not refresh_device:
+                        # The device may have changed; re-resolve once from a fresh list and
+                        # retry with a fresh transfer, so the retry is not an exact repeat.
+                        invalidate_device_cache()
+                        forget_transfer(sp)
+                        refresh_device = True
+                        continue
                     end_message = "Could not start playback on your active Spotify device."
                     if playback_error:
                         end_message = f"{end_message}\nSpotify error: {playback_error}"
@@ -126,6 +179,7 @@ def play_game(
                     break
 
                 # Count this as an attempted round once playback starts successfully.
+                refresh_device = False
                 attempts += 1
                 user_choice, status = timed_choice_prompt(
                     len(options),
@@ -151,13 +205,13 @@ def play_game(
                     break
 
                 selected_track = options[user_choice]
-                if selected_track["uri"] == current_track["uri"]:
+                if selected_track.uri == current_track.uri:
                     # Correct answer continues the run.
                     score += 1
                     continue
 
-                artists = ", ".join(current_track["artists"])
-                end_message = f"Incorrect. Correct answer: {current_track['name']} - {artists}"
+                artists = ", ".join(current_track.artists)
+                end_message = f"Incorrect. Correct answer: {current_track.name} - {artists}"
                 last_status = "incorrect"
                 break
         finally:
@@ -170,7 +224,13 @@ def play_game(
 
     # Re-print the final option screen when game ended by timeout/incorrect/error.
     if end_message and last_status != "quit" and last_round_option_blocks:
-        print("\n".join(build_round_lines(score=score, remaining_seconds=0, option_blocks=last_round_option_blocks)))
+        final_lines = build_round_lines(
+            score=score,
+            remaining_seconds=0,
+            option_blocks=last_round_option_blocks,
+            width=last_round_width,
+        )
+        print("\n".join(final_lines))
         print(build_answer_prompt(option_count=last_round_option_count))
 
     if end_message:
@@ -1,40 +1,156 @@
 """Run-history persistence and high-score aggregation helpers."""
 
-import json
+import atexit
+import os
 from typing import Any
 
-from .config import GAME_HISTORY_PATH
+from . import jsonio
+from .config import GAME_HISTORY_PATH, HIGH_SCORE_PATH
 
+# Append-only descriptor is opened on first use and kept for the rest of the process.
+_history_fd: int | None = None
 
-def get_high_score() -> int:
-    """Scan history file and return the highest recorded score."""
-    if not GAME_HISTORY_PATH.exists():
-        return 0
 
-    high_score = 0
+def scan_history_high_score() -> int | None:
+    """Scan history file and return the highest recorded score, or None if unreadable."""
     try:
-        with GAME_HISTORY_PATH.open("r", encoding="utf-8") as file:
-            for raw_line in file:
-                line = raw_line.strip()
-                if not line:
-                    continue
-                try:
-                    payload = json.loads(line)
-                except json.JSONDecodeError:
-                    # Ignore malformed rows and continue scanning.
-                    continue
-
-                score = payload.get("score", 0)
-                if isinstance(score, int):
-                    high_score = max(high_score, score)
+        # One read + bulk split instead of a Python-level readline per row.
+        data = GAME_HISTORY_PATH.read_bytes()
     except OSError:
         # Missing/unreadable history should not block gameplay.
+        return None
+
+    high_score = 0
+    for line in data.splitlines():
+        # Cheap substring check skips blank/irrelevant rows before any decoding.
+        if b'"score"' not in line:
+            continue
+        try:
+            payload = jsonio.loads(line)
+        except jsonio.JSONDecodeError:
+            # Ignore malformed rows and continue scanning.
+            continue
+
+        score = payload.get("score", 0) if isinstance(payload, dict) else 0
+        if isinstance(score, int):
+            high_score = max(high_score, score)
+
+    return high_score
+
+
+def history_fingerprint() -> tuple[int, int] | None:
+    """Return the history file's (size, mtime_ns), or None when it is missing/unreadable."""
+    try:
+        stat = GAME_HISTORY_PATH.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def read_high_score_sidecar() -> int | None:
+    """Read the persisted high score, or None when the sidecar is missing, corrupt, or stale."""
+    fingerprint = history_fingerprint()
+    if fingerprint is None:
+        return None
+
+    try:
+        payload = jsonio.loads(HIGH_SCORE_PATH.read_bytes())
+    except (jsonio.JSONDecodeError, OSError):
+        return None
+
+    if not isinstance(payload, dict):
+        return None
+
+    # Only trust the cached score for the exact history file it was computed from.
+    if [payload.get("history_size"), payload.get("history_mtime_ns")] != list(fingerprint):
+        return None
+
+    high_score = payload.get("high_score")
+    return high_score if isinstance(high_score, int) else None
+
+
+def write_high_score_sidecar(high_score: int) -> None:
+    """Persist the high score so later startups skip the history scan."""
+    fingerprint = history_fingerprint()
+    if fingerprint is None:
+        # Nothing to vouch for; an orphaned sidecar would resurrect a reset score.
+        return
+
+    payload = {
+        "high_score": high_score,
+        "history_size": fingerprint[0],
+        "history_mtime_ns": fingerprint[1],
+    }
+    try:
+        jsonio.write_bytes_atomic(HIGH_SCORE_PATH, jsonio.dumps(payload))
+    except OSError:
+        # The sidecar is only a cache; history stays the source of truth.
+        return
+
+
+def get_high_score() -> int:
+    """Return the highest recorded score, reading the sidecar when available."""
+    if not GAME_HISTORY_PATH.exists():
+        # Deleting history resets the high score; drop the cache that outlived it.
+        try:
+            HIGH_SCORE_PATH.unlink(missing_ok=True)
+        except OSError:
+            pass
         return 0
 
+    high_score = read_high_score_sidecar()
+    if high_score is None:
+        high_score = scan_history_high_score()
+        if high_score is None:
+            # A failed read must not be cached as the permanent high score.
+            return 0
+        # One-time full scan seeds the sidecar for future runs.
+        write_high_score_sidecar(high_score)
     return high_score
 
 
+def close_history_fd() -> None:
+    """Close the shared history descriptor if it is open."""
+    global _history_fd
+    if _history_fd is not None:
+        os.close(_history_fd)
+        _history_fd = None
+
+
+def get_history_fd() -> int:
+    """Return the shared O_APPEND descriptor for the history file."""
+    global _history_fd
+    if _history_fd is not None and os.fstat(_history_fd).st_nlink == 0:
+        # History was deleted while open (a reset); start a fresh file instead of the orphan.
+        close_history_fd()
+
+    if _history_fd is None:
+        # O_APPEND makes each os.write land at end-of-file, so one row is one syscall.
+        _history_fd = os.open(GAME_HISTORY_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    return _history_fd
+
+
+atexit.register(close_history_fd)
+
+
 def append_game_history(summary: dict[str, Any]) -> None:
-    """Append one game summary row in JSONL format."""
-    with GAME_HISTORY_PATH.open("a", encoding="utf-8") as file:
-        file.write(json.dumps(summary) + "\n")
+    """Append one game summary row in JSONL format and update the high score."""
+    # Read before appending: the sidecar is validated against the pre-append history.
+    high_score = read_high_score_sidecar()
+
+    row = memoryview(jsonio.dumps(summary) + b"\n")
+    fd = get_history_fd()
+    while row:
+        # Regular-file writes are normally complete; loop only guards short writes.
+        row = row[os.write(fd, row) :]
+
+    if high_score is None:
+        # The scan already includes the row just appended.
+        high_score = scan_history_high_score()
+        if high_score is None:
+            return
+
+    score = summary.get("score", 0)
+    if isinstance(score, int):
+        high_score = max(high_score, score)
+    write_high_score_sidecar(high_score)
@@ -0,0 +1,47 @@
+"""JSON encode/decode and file persistence helpers that prefer orjson when installed."""
+
+import dataclasses
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+try:
+    # Optional fast JSON backend (Rust/SIMD); much faster on large track lists.
+    import orjson
+except ImportError:
+    # Fallback path for environments without orjson installed.
+    orjson = None
+
+# orjson.JSONDecodeError subclasses this, so one except clause covers both backends.
+JSONDecodeError = json.JSONDecodeError
+
+
+def _encode_fallback(value: Any) -> Any:
+    """Encode dataclass instances for the stdlib encoder (orjson does this natively)."""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """Serialize a payload (dataclasses included) to UTF-8 encoded JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    # Compact separators match orjson output and keep rows/cache files small.
+    return json.dumps(payload, separators=(",", ":"), default=_encode_fallback).encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    """Deserialize JSON from bytes or text."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def write_bytes_atomic(path: Path, data: bytes) -> None:
+    """Replace a file's contents so readers never observe a partial write."""
+    # Temp file lives beside the target so os.replace stays a same-filesystem rename.
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
@@ -1,15 +1,57 @@
 """Library ingestion, normalization, caching, and refresh logic."""
 
-import json
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Any
 
 import spotipy
 
-from .config import LIBRARY_CACHE_PATH, SAVED_TRACKS_PAGE_SIZE
-
-
-def normalize_track(raw_track: dict[str, Any] | None) -> dict[str, Any] | None:
+from . import jsonio
+from .config import (
+    COMPRESSED_LIBRARY_CACHE_PATH,
+    LIBRARY_CACHE_PATH,
+    LIBRARY_SYNC_BATCH_PAUSE_SECONDS,
+    LIBRARY_SYNC_TOKEN_SKEW_SECONDS,
+    LIBRARY_SYNC_WORKERS,
+    SAVED_TRACKS_PAGE_SIZE,
+)
+from .spotify_client import (
+    SerializedAuthManager,
+    clone_spotify_client,
+    close_sessions,
+    ensure_fresh_token,
+)
+
+try:
+    # Optional compression backend; repeated JSON keys make track caches shrink several-fold.
+    import zstandard
+except ImportError:
+    # Fallback path: store the cache as plain JSON.
+    zstandard = None
+
+# Errors meaning an unusable cache file; zstd adds its own when available.
+CACHE_READ_ERRORS: tuple[type[Exception], ...] = (jsonio.JSONDecodeError, OSError)
+if zstandard is not None:
+    CACHE_READ_ERRORS += (zstandard.ZstdError,)
+
+
+# Frozen so records are hashable and can key render caches.
+@dataclass(slots=True, frozen=True)
+class Track:
+    """Normalized saved-track record used across sync, rounds, and playback."""
+
+    uri: str
+    name: str
+    artists: tuple[str, ...]
+    duration_ms: int
+
+
+def normalize_track(raw_track: dict[str, Any] | None) -> Track | None:
     """Normalize a raw Spotify track payload into the app's track schema."""
     if not isinstance(raw_track, dict):
         return None
@@ -37,58 +79,117 @@ def normalize_track(raw_track: dict[str, Any] | None) -> dict[str, Any] | None:
     if not isinstance(duration_ms, int):
         duration_ms = 0
 
-    return {
-        "uri": uri,
-        "name": str(raw_track.get("name", "Unknown Track")),
-        "artists": artists,
-        "duration_ms": duration_ms,
-    }
+    return Track(
+        uri=uri,
+        name=str(raw_track.get("name", "Unknown Track")),
+        artists=tuple(artists),
+        duration_ms=duration_ms,
+    )
+
+
+def normalize_track_fast(raw_track: dict[str, Any] | None) -> Track | None:
+    """Normalize the usual Spotify API track shape, deferring anything else to normalize_track."""
+    try:
+        uri = raw_track["uri"]
+        name = raw_track["name"]
+        artists = tuple([artist["name"].strip() for artist in raw_track["artists"]])
+        duration_ms = raw_track["duration_ms"]
+    except (KeyError, TypeError, AttributeError):
+        return normalize_track(raw_track)
+
+    # Any field outside the expected shape takes the defensive path for identical results.
+    if not uri or type(name) is not str or type(duration_ms) is not int or not artists or not all(artists):
+        return normalize_track(raw_track)
 
+    return Track(uri=uri, name=name, artists=artists, duration_ms=duration_ms)
 
-def fetch_library_from_spotify(sp: spotipy.Spotify) -> list[dict[str, Any]]:
-    """Fetch all saved tracks from Spotify using paginated requests."""
-    tracks: list[dict[str, Any]] = []
-    offset = 0
 
-    while True:
-        # Spotify caps saved-track page size, so fetch until an empty page.
-        page = sp.current_user_saved_tracks(limit=SAVED_TRACKS_PAGE_SIZE, offset=offset)
-        items = page.get("items", [])
-        if not items:
-            break
+def fetch_library_from_spotify(sp: spotipy.Spotify) -> list[Track]:
+    """Fetch all saved tracks from Spotify using concurrent paginated requests."""
+    # Insertion-ordered URI -> track map de-duplicates in the same pass that collects.
+    tracks_by_uri: dict[str, Track] = {}
 
-        for item in items:
-            track = normalize_track(item.get("track"))
+    # Normalize one page into the shared map; the first record per URI wins.
+    def collect_page(page: dict[str, Any]) -> None:
+        for item in page.get("items", []):
+            track = normalize_track_fast(item.get("track"))
             if track:
-                tracks.append(track)
+                tracks_by_uri.setdefault(track.uri, track)
+        print(f"\rSyncing Spotify library: {len(tracks_by_uri)} tracks", end="", flush=True)
+
+    # The first page reports the library size, so remaining offsets are known upfront.
+    first_page = sp.current_user_saved_tracks(limit=SAVED_TRACKS_PAGE_SIZE, offset=0)
+    collect_page(first_page)
+    total = first_page.get("total") or 0
+    offsets = range(SAVED_TRACKS_PAGE_SIZE, total, SAVED_TRACKS_PAGE_SIZE)
+
+    # Refresh a token that could expire mid-sync now, while only this thread uses it.
+    ensure_fresh_token(sp, skew_seconds=LIBRARY_SYNC_TOKEN_SKEW_SECONDS)
+
+    # One client (and HTTP session) per worker thread; the auth manager is shared behind a lock.
+    shared_auth_manager = SerializedAuthManager(sp.auth_manager)
+    worker_state = threading.local()
+    worker_clients: list[spotipy.Spotify] = []
+
+    # Fetch one page on the calling worker's own client, creating it on first use.
+    def fetch_page(offset: int) -> dict[str, Any]:
+        client = getattr(worker_state, "client", None)
+        if client is None:
+            client = clone_spotify_client(sp, auth_manager=shared_auth_manager)
+            worker_state.client = client
+            worker_clients.append(client)
+
+        # Spotipy's session already retries 429/5xx (honoring Retry-After); errors that
+        # survive those retries abort the sync.
+        return client.current_user_saved_tracks(limit=SAVED_TRACKS_PAGE_SIZE, offset=offset)
 
-        offset += len(items)
-        print(f"\rSyncing Spotify library: {len(tracks)} tracks", end="", flush=True)
+    try:
+        with ThreadPoolExecutor(max_workers=LIBRARY_SYNC_WORKERS) as executor:
+            # Dispatch one batch per worker count, pausing between batches to pace requests.
+            for batch_start in range(0, len(offsets), LIBRARY_SYNC_WORKERS):
+                if batch_start:
+                    time.sleep(LIBRARY_SYNC_BATCH_PAUSE_SECONDS)
+                batch = offsets[batch_start : batch_start + LIBRARY_SYNC_WORKERS]
+                # executor.map yields pages in offset order regardless of completion order.
+                for page in executor.map(fetch_page, batch):
+                    collect_page(page)
+    finally:
+        for client in worker_clients:
+            close_sessions(client, include_auth_manager=False)
 
     print()
+    return list(tracks_by_uri.values())
+
+
+def library_cache_path() -> Path:
+    """Return the cache file this environment reads and writes."""
+    if zstandard is not None and (
+        COMPRESSED_LIBRARY_CACHE_PATH.exists() or not LIBRARY_CACHE_PATH.exists()
+    ):
+        return COMPRESSED_LIBRARY_CACHE_PATH
+    return LIBRARY_CACHE_PATH
 
-    # De-duplicate by URI to keep one canonical track record per song.
-    seen_uris: set[str] = set()
-    deduplicated: list[dict[str, Any]] = []
-    for track in tracks:
-        uri = track["uri"]
-        if uri in seen_uris:
-            continue
-        seen_uris.add(uri)
-        deduplicated.append(track)
 
-    return deduplicated
+@functools.lru_cache(maxsize=4)
+def read_cache_payload(path: str, mtime_ns: int, size: int) -> Any:
+    """Decode a cache file, memoized by (path, mtime, size) so unchanged files decode once."""
+    # mtime_ns/size only participate in the cache key; a rewrite changes them.
+    data = Path(path).read_bytes()
+    if path.endswith(".zst"):
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return jsonio.loads(data)
 
 
-def load_library_cache() -> list[dict[str, Any]]:
+def load_library_cache() -> list[Track]:
     """Load cached library data from disk, tolerating legacy shapes."""
-    if not LIBRARY_CACHE_PATH.exists():
+    cache_path = library_cache_path()
+    if not cache_path.exists():
         return []
 
     try:
-        with LIBRARY_CACHE_PATH.open("r", encoding="utf-8") as file:
-            payload = json.load(file)
-    except (json.JSONDecodeError, OSError):
+        stat = cache_path.stat()
+        payload = read_cache_payload(str(cache_path.resolve()), stat.st_mtime_ns, stat.st_size)
+    except CACHE_READ_ERRORS:
         # Fall back to empty cache on unreadable/corrupt files.
         return []
 
@@ -100,7 +201,7 @@ def load_library_cache() -> list[dict[str, Any]]:
     else:
         return []
 
-    tracks: list[dict[str, Any]] = []
+    tracks_by_uri: dict[str, Track] = {}
     for entry in raw_tracks:
         # Some legacy caches stored each row under {"track": ...}.
         if isinstance(entry, dict) and "track" in entry:
@@ -108,25 +209,35 @@ def load_library_cache() -> list[dict[str, Any]]:
         else:
             track = normalize_track(entry if isinstance(entry, dict) else None)
 
+        # Legacy caches may repeat URIs; rounds rely on one record per song.
         if track:
-            tracks.append(track)
+            tracks_by_uri.setdefault(track.uri, track)
 
-    return tracks
+    return list(tracks_by_uri.values())
 
 
-def save_library_cache(tracks: list[dict[str, Any]]) -> None:
-    """Persist normalized track list and sync metadata to disk."""
+def save_library_cache(tracks: list[Track]) -> Path:
+    """Persist normalized track list and sync metadata, returning the file written."""
     payload = {
         "synced_at_utc": datetime.now(timezone.utc).isoformat(),
         "track_count": len(tracks),
         "tracks": tracks,
     }
 
-    with LIBRARY_CACHE_PATH.open("w", encoding="utf-8") as file:
-        json.dump(payload, file)
+    data = jsonio.dumps(payload)
+    if zstandard is not None:
+        cache_path, stale_path = COMPRESSED_LIBRARY_CACHE_PATH, LIBRARY_CACHE_PATH
+        data = zstandard.ZstdCompressor(level=3).compress(data)
+    else:
+        cache_path, stale_path = LIBRARY_CACHE_PATH, COMPRESSED_LIBRARY_CACHE_PATH
+
+    jsonio.write_bytes_atomic(cache_path, data)
+    # Keep a single cache on disk so an older copy in the other format is never loaded.
+    stale_path.unlink(missing_ok=True)
+    return cache_path
 
 
-def load_or_sync_library(sp: spotipy.Spotify, refresh_library: bool) -> list[dict[str, Any]]:
+def load_or_sync_library(sp: spotipy.Spotify, refresh_library: bool) -> list[Track]:
     """Load cache when available, or sync from Spotify when needed."""
     if not refresh_library:
         cached_tracks = load_library_cache()
@@ -137,6 +248,6 @@ def load_or_sync_library(sp: spotipy.Spotify, refresh_library: bool) -> list[dic
     # Forced refresh or empty cache path.
     print("Refreshing saved tracks from Spotify...")
     tracks = fetch_library_from_spotify(sp)
-    save_library_cache(tracks)
-    print(f"Saved {len(tracks)} tracks to {LIBRARY_CACHE_PATH}.")
+    cache_path = save_library_cache(tracks)
+    print(f"Saved {len(tracks)} tracks to {cache_path}.")
     return tracks
@@ -4,13 +4,29 @@ import random
 import time
 from typing import Any
 
+import requests
 import spotipy
 from spotipy.exceptions import SpotifyException
 
+from .library import Track
+
 # Small safety buffer so snippets do not accidentally clip near track end.
 MIN_SNIPPET_REMAINING_MARGIN_MS = 1500
 FULL_SNIPPET_WINDOW_ERROR = "Could not start track with enough remaining time for full snippet."
 
+# Upper bound on waiting for Spotify to report a just-started track during verification.
+PLAYBACK_STATE_POLL_BUDGET_SECONDS = 0.3
+
+# Device lists change at human timescale; reuse a fetched list for this long. Playback
+# failures that point at a stale device invalidate it early.
+DEVICE_CACHE_TTL_SECONDS = 30.0
+
+# (monotonic fetch time, devices) from the most recent sp.devices() call.
+_devices_cache: tuple[float, list[dict[str, Any]]] | None = None
+
+# id(sp) -> device playback was last transferred to, so repeat rounds skip the transfer call.
+_transferred_devices: dict[int, str] = {}
+
 
 def remaining_ms_for_track(playback_state: dict[str, Any], track_uri: str) -> int | None:
     """Return remaining milliseconds when playback state matches target track."""
@@ -27,100 +43,177 @@ def remaining_ms_for_track(playback_state: dict[str, Any], track_uri: str) -> in
     return live_duration_ms - progress_ms
 
 
+def has_enough_remaining_window_local(
+    duration_ms: int,
+    start_position_ms: int,
+    required_remaining_ms: int,
+) -> bool:
+    """Check from the chosen start position alone whether enough of the track remains."""
+    return duration_ms - start_position_ms >= required_remaining_ms
+
+
 def has_enough_remaining_window(
     sp: spotipy.Spotify,
     track_uri: str,
     required_remaining_ms: int,
 ) -> bool:
-    """Check whether the currently playing track has enough time left."""
-    for attempt in range(3):
+    """Poll live playback state until it shows the target track, then check time left."""
+    deadline = time.monotonic() + PLAYBACK_STATE_POLL_BUDGET_SECONDS
+    delay_seconds = 0.02
+    while True:
         playback_state = sp.current_playback()
         if isinstance(playback_state, dict):
             remaining_ms = remaining_ms_for_track(playback_state, track_uri)
             if isinstance(remaining_ms, int):
+                # State has caught up; the answer will not change by waiting longer.
                 return remaining_ms >= required_remaining_ms
 
-        # Fallback only on last check to reduce extra network calls.
-        if attempt == 2:
-            playback_state = sp.current_user_playing_track()
-            if isinstance(playback_state, dict):
-                remaining_ms = remaining_ms_for_track(playback_state, track_uri)
-                if isinstance(remaining_ms, int):
-                    return remaining_ms >= required_remaining_ms
+        # Not propagated yet: back off 20/40/80ms so fast servers answer on the first poll.
+        if time.monotonic() + delay_seconds > deadline:
+            return False
+        time.sleep(delay_seconds)
+        delay_seconds *= 2
 
-        time.sleep(0.06)
 
-    return False
+def started_despite_error(
+    sp: spotipy.Spotify,
+    exc: Exception,
+    track_uri: str,
+    required_remaining_ms: int,
+) -> bool:
+    """Check live state after a start_playback failure that may still have taken effect."""
+    if isinstance(exc, SpotifyException):
+        # Spotipy reports 429/5xx whose session retries ran out as 429; the PUT may have landed.
+        outcome_unknown = exc.http_status == 429 or exc.http_status >= 500
+    else:
+        # Timeouts and dropped connections can happen after Spotify already acted.
+        outcome_unknown = isinstance(exc, (requests.Timeout, requests.ConnectionError))
+    if not outcome_unknown:
+        return False
 
+    try:
+        return has_enough_remaining_window(sp=sp, track_uri=track_uri, required_remaining_ms=required_remaining_ms)
+    except (SpotifyException, requests.RequestException):
+        return False
+
+
+def get_devices(sp: spotipy.Spotify) -> list[dict[str, Any]]:
+    """Return available devices, reusing a recent list within the cache TTL."""
+    global _devices_cache
+    now = time.monotonic()
+    if _devices_cache is not None and now - _devices_cache[0] < DEVICE_CACHE_TTL_SECONDS:
+        return _devices_cache[1]
 
-def resolve_device(sp: spotipy.Spotify, preferred_device_id: str | None = None) -> str | None:
-    """Resolve a usable playback device, preferring the previous round's device."""
     devices = sp.devices().get("devices", [])
-    if not devices:
-        return None
+    _devices_cache = (now, devices)
+    return devices
 
-    # Keep using the same device when possible to avoid unnecessary hopping.
-    if preferred_device_id:
-        for device in devices:
-            if device.get("id") == preferred_device_id and not device.get("is_restricted", False):
-                return preferred_device_id
 
-    # Otherwise prefer active devices, then any unrestricted device.
-    for device in devices:
-        if device.get("is_active") and not device.get("is_restricted", False):
-            return device.get("id")
+def invalidate_device_cache() -> None:
+    """Drop the cached device list so the next lookup asks Spotify."""
+    global _devices_cache
+    _devices_cache = None
 
-    for device in devices:
-        if not device.get("is_restricted", False):
-            return device.get("id")
 
-    return None
+def forget_transfer(sp: spotipy.Spotify) -> None:
+    """Forget the device sp last transferred to so the next snippet start transfers again."""
+    _transferred_devices.pop(id(sp), None)
+
+
+def resolve_device(sp: spotipy.Spotify, preferred_device_id: str | None = None) -> str | None:
+    """Resolve a usable playback device, preferring the previous round's device."""
+    # One pass: the preferred device wins outright; otherwise the first active device,
+    # then the first unrestricted one. Staying on the same device avoids hopping.
+    fallback_id: str | None = None
+    active_id: str | None = None
+    for device in get_devices(sp):
+        if device.get("is_restricted", False):
+            continue
+
+        device_id = device.get("id")
+        if preferred_device_id and device_id == preferred_device_id:
+            return preferred_device_id
+        if active_id is None and device.get("is_active"):
+            active_id = device_id
+        if fallback_id is None:
+            fallback_id = device_id
+
+    return active_id if active_id is not None else fallback_id
 
 
 def play_random_snippet(
     sp: spotipy.Spotify,
-    track: dict[str, Any],
+    track: Track,
     device_id: str,
     snippet_seconds: int,
+    rng: random.Random,
+    verify: bool = False,
 ) -> tuple[bool, str | None]:
     """Start playback from a random safe position and verify snippet viability."""
     snippet_ms = max(1, snippet_seconds) * 1000
-    duration_ms = track.get("duration_ms", 0)
-    if not isinstance(duration_ms, int):
-        duration_ms = 0
+    duration_ms = track.duration_ms
 
     # Reject tracks shorter than the requested snippet to avoid unwinnable rounds.
     if duration_ms < snippet_ms:
         return False, "Track is shorter than the selected snippet length."
 
     last_error: str | None = None
-    for _ in range(3):
+    attempts = 3
+    for attempt in range(attempts):
         # Keep at least a small safety margin from the tail to absorb position drift.
         max_start_ms = max(0, duration_ms - snippet_ms - MIN_SNIPPET_REMAINING_MARGIN_MS)
-        start_position_ms = random.randint(0, max_start_ms) if max_start_ms else 0
+        start_position_ms = rng.randrange(max_start_ms + 1) if max_start_ms else 0
 
+        required_remaining_ms = snippet_ms - MIN_SNIPPET_REMAINING_MARGIN_MS
+        transferred = _transferred_devices.get(id(sp)) == device_id
         try:
-            # Ensure the selected device is the current playback target.
-            sp.transfer_playback(device_id=device_id, force_play=False)
-            sp.start_playback(
-                uris=[track["uri"]],
-                device_id=device_id,
-                position_ms=start_position_ms,
-            )
-
-            # Verify real playback state before accepting this start point.
-            if has_enough_remaining_window(
-                sp=sp,
-                track_uri=track["uri"],
-                required_remaining_ms=snippet_ms - MIN_SNIPPET_REMAINING_MARGIN_MS,
+            # Transfer only when the target device changed; start_playback already names it.
+            if not transferred:
+                sp.transfer_playback(device_id=device_id, force_play=False)
+                _transferred_devices[id(sp)] = device_id
+            try:
+                sp.start_playback(
+                    uris=[track.uri],
+                    device_id=device_id,
+                    position_ms=start_position_ms,
+                )
+            except (SpotifyException, requests.RequestException) as exc:
+                # Only a failed start leaves it unknown whether music is playing; ask Spotify.
+                if started_despite_error(sp, exc, track.uri, required_remaining_ms):
+                    return True, None
+                raise
+
+            # The start position is chosen here, so remaining time is known without a network
+            # call; verify=True additionally confirms it against live playback state.
+            if has_enough_remaining_window_local(duration_ms, start_position_ms, required_remaining_ms) and (
+                not verify
+                or has_enough_remaining_window(
+                    sp=sp,
+                    track_uri=track.uri,
+                    required_remaining_ms=required_remaining_ms,
+                )
             ):
                 return True, None
 
             last_error = FULL_SNIPPET_WINDOW_ERROR
             continue
+        except requests.RequestException as exc:
+            # Network failure that outlasted the session's retries; report it like an API error.
+            last_error = str(exc)
+            break
         except SpotifyException as exc:
             last_error = str(exc)
-            time.sleep(0.4)
+            if exc.http_status == 404 or exc.reason == "NO_ACTIVE_DEVICE":
+                # Only a lost device needs a fresh transfer; other errors keep the current one.
+                forget_transfer(sp)
+                if transferred and attempt + 1 < attempts:
+                    # The skipped transfer may be stale (device went inactive); retry with one.
+                    continue
+                # Device vanished; make the next resolve_device fetch a fresh list.
+                invalidate_device_cache()
+            # Spotipy's session already retried 429/5xx (honoring Retry-After) before raising,
+            # and auth/missing-device failures would fail the same way again.
+            break
 
     if last_error == FULL_SNIPPET_WINDOW_ERROR:
         return False, FULL_SNIPPET_WINDOW_ERROR
@@ -135,7 +228,8 @@ def pause_playback(sp: spotipy.Spotify, device_id: str | None) -> None:
             return
         except SpotifyException:
             # Device-specific pause can fail if active device changed mid-round.
-            pass
+            invalidate_device_cache()
+            forget_transfer(sp)
 
     try:
         sp.pause_playback()
@@ -1,11 +1,15 @@
 """Spotipy client setup and cleanup helpers."""
 
 import logging
+import threading
+import time
+from typing import Any
 
+import requests
 import spotipy
-from spotipy.oauth2 import SpotifyOAuth
+from spotipy.oauth2 import SpotifyOauthError, SpotifyOAuth
 
-from .config import SCOPE, TOKEN_CACHE_PATH
+from .config import SCOPE, TOKEN_CACHE_PATH, TOKEN_REFRESH_SKEW_SECONDS
 from .env import get_required_env
 
 
@@ -34,6 +38,8 @@ def create_spotify_client() -> spotipy.Spotify:
         show_dialog=False,
     )
 
+    # The session's status retries are the app's only retry layer: 429 and 5xx are retried
+    # with backoff (honoring Retry-After); 401/403/404 surface immediately.
     return spotipy.Spotify(
         auth_manager=auth_manager,
         requests_timeout=10,
@@ -42,9 +48,59 @@ def create_spotify_client() -> spotipy.Spotify:
     )
 
 
-def close_sessions(sp: spotipy.Spotify) -> None:
+class SerializedAuthManager:
+    """Auth manager proxy that lets one thread at a time read or refresh the token."""
+
+    def __init__(self, auth_manager: SpotifyOAuth) -> None:
+        self._auth_manager = auth_manager
+        self._lock = threading.Lock()
+
+    def get_access_token(self, *args: Any, **kwargs: Any) -> Any:
+        # Spotipy's token cache is truncated then rewritten on refresh; concurrent
+        # readers could otherwise see an empty file and fail to decode it.
+        with self._lock:
+            return self._auth_manager.get_access_token(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._auth_manager, name)
+
+
+def clone_spotify_client(sp: spotipy.Spotify, auth_manager: Any = None) -> spotipy.Spotify:
+    """Create a client with its own HTTP session that shares sp's (or the given) auth manager."""
+    # requests.Session is not safe to share across threads, so workers get their own.
+    return spotipy.Spotify(
+        auth_manager=auth_manager or sp.auth_manager,
+        requests_timeout=sp.requests_timeout,
+        retries=sp.retries,
+        status_retries=sp.status_retries,
+    )
+
+
+def ensure_fresh_token(sp: spotipy.Spotify, skew_seconds: float = TOKEN_REFRESH_SKEW_SECONDS) -> None:
+    """Refresh the OAuth token early so expiry never stalls a playback call mid-round."""
+    cache_handler = getattr(sp.auth_manager, "cache_handler", None)
+    if cache_handler is None:
+        return
+
+    token_info = cache_handler.get_cached_token()
+    if not token_info or "refresh_token" not in token_info:
+        return
+
+    if token_info.get("expires_at", 0) - time.time() >= skew_seconds:
+        return
+
+    try:
+        # refresh_access_token also writes the new token back to the cache handler.
+        sp.auth_manager.refresh_access_token(token_info["refresh_token"])
+    except (SpotifyOauthError, requests.RequestException):
+        # Best effort: Spotipy still refreshes lazily on the next API call.
+        pass
+
+
+def close_sessions(sp: spotipy.Spotify, include_auth_manager: bool = True) -> None:
     """Close HTTP sessions held by Spotipy objects."""
-    for obj in (sp, sp.auth_manager):
+    owners = (sp, sp.auth_manager) if include_auth_manager else (sp,)
+    for obj in owners:
         # Spotipy exposes sessions on private attributes; close defensively.
         session = getattr(obj, "_session", None)
         close_fn = getattr(session, "close", None)
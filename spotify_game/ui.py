@@ -1,14 +1,19 @@
 """Terminal UI rendering and timed input handling."""
 
+import functools
 import math
-import select
+import os
+import selectors
 import shutil
+import signal
 import sys
 import textwrap
 import time
+import unicodedata
 from collections.abc import Callable
 
 from .config import MAX_TERMINAL_WIDTH
+from .library import Track
 
 try:
     # Raw terminal input helpers (POSIX).
@@ -19,6 +24,54 @@ except ImportError:
     termios = None
     tty = None
 
+# Whether stdout is a TTY cannot change mid-run; checked once instead of every frame.
+_STDOUT_IS_TTY = sys.stdout.isatty()
+
+# Clear screen + scrollback and move the cursor home.
+CLEAR_SCREEN_SEQUENCE = "\033[2J\033[3J\033[H"
+
+# Terminal size is cached between renders and dropped whenever the terminal resizes.
+_cached_terminal_size: os.terminal_size | None = None
+_resize_handler_installed = False
+
+# Keystroke classes for the timed prompt; frozensets keep per-key dispatch to hash probes.
+SUBMIT_KEYS = frozenset("\n\r")
+BACKSPACE_KEYS = frozenset("\x7f\b")
+QUIT_KEYS = frozenset("qQ")
+DIGIT_KEYS = frozenset("0123456789")
+
+# Row of the countdown line within build_round_lines output.
+TIMER_LINE_INDEX = 2
+
+# (terminal size, screen line count) of the last full frame when it can be patched in place.
+_partial_redraw_state: tuple[os.terminal_size, int] | None = None
+
+
+def _invalidate_terminal_size(signum: int, frame: object) -> None:
+    """SIGWINCH handler: force the next size lookup to query the terminal."""
+    global _cached_terminal_size
+    _cached_terminal_size = None
+    # Bodies rendered for the old width will not be reused; drop them.
+    build_option_body.cache_clear()
+
+
+if hasattr(signal, "SIGWINCH"):
+    try:
+        signal.signal(signal.SIGWINCH, _invalidate_terminal_size)
+        _resize_handler_installed = True
+    except ValueError:
+        # Handlers can only be installed from the main thread; fall back to no caching.
+        pass
+
+
+def display_width(text: str) -> int:
+    """Estimate the terminal cells text occupies (len() counts code points, not cells)."""
+    if text.isascii():
+        return len(text)
+    # Wide/fullwidth characters (CJK, most emoji) take two cells. Zero-width combining marks
+    # still count one, which only over-estimates and so keeps fit checks safe.
+    return sum(2 if unicodedata.east_asian_width(char) in "WF" else 1 for char in text)
+
 
 def build_answer_prompt(option_count: int, answer_buffer: str = "") -> str:
     """Build the standard answer prompt line."""
@@ -26,23 +79,26 @@ def build_answer_prompt(option_count: int, answer_buffer: str = "") -> str:
     return f"Choose {buttons} | [q] quit -> {answer_buffer}"
 
 
-def get_terminal_width() -> int:
-    """Get terminal width with a readability cap and safe fallback."""
-    return min(MAX_TERMINAL_WIDTH, shutil.get_terminal_size(fallback=(MAX_TERMINAL_WIDTH, 24)).columns)
-
+def get_terminal_size() -> os.terminal_size:
+    """Get terminal size, reusing the cached value until the next resize."""
+    global _cached_terminal_size
+    size = _cached_terminal_size
+    if size is None:
+        size = shutil.get_terminal_size(fallback=(MAX_TERMINAL_WIDTH, 24))
+        # Only cache when a SIGWINCH handler exists to invalidate the value.
+        if _resize_handler_installed:
+            _cached_terminal_size = size
+    return size
 
-def clear_terminal() -> None:
-    """Clear the terminal screen when stdout is an interactive TTY."""
-    if not sys.stdout.isatty():
-        return
 
-    sys.stdout.write("\033[2J\033[3J\033[H")
-    sys.stdout.flush()
+def get_terminal_width() -> int:
+    """Get terminal width with a readability cap and safe fallback."""
+    return min(MAX_TERMINAL_WIDTH, get_terminal_size().columns)
 
 
 def enter_alternate_screen() -> bool:
     """Enter alternate terminal buffer for full-screen game rendering."""
-    if not sys.stdout.isatty():
+    if not _STDOUT_IS_TTY:
         return False
 
     sys.stdout.write("\033[?1049h\033[H")
@@ -52,102 +108,150 @@ def enter_alternate_screen() -> bool:
 
 def leave_alternate_screen() -> None:
     """Leave alternate terminal buffer and restore normal shell screen."""
-    if not sys.stdout.isatty():
+    if not _STDOUT_IS_TTY:
         return
 
     sys.stdout.write("\033[?1049l")
     sys.stdout.flush()
 
 
-def build_option_lines(index: int, track: dict, width: int) -> list[str]:
-    """Render one answer option as wrapped title/artist lines."""
+@functools.lru_cache(maxsize=4096)
+def wrap_text(text: str, width: int) -> tuple[str, ...]:
+    """Wrap text on word boundaries, memoized since tracks recur across rounds."""
+    # Never break words or hyphens so titles/artists stay readable.
+    return tuple(
+        textwrap.wrap(
+            text,
+            width=width,
+            break_long_words=False,
+            break_on_hyphens=False,
+        )
+    ) or (text,)
+
+
+@functools.lru_cache(maxsize=512)
+def build_option_body(track: Track, width: int) -> tuple[str, ...]:
+    """Render one option's wrapped title/artist lines without its index label."""
+    # Memoized per (track, width): recurring distractors cost one lookup after warm-up.
     lines: list[str] = []
     title_width = max(30, width - 8)
     artist_width = max(30, width - 12)
 
-    # Wrap long titles without breaking words so output stays readable.
-    title_lines = textwrap.wrap(
-        track["name"],
-        width=title_width,
-        break_long_words=False,
-        break_on_hyphens=False,
-    ) or [track["name"]]
-    lines.append(f"[{index}] {title_lines[0]}")
+    # First title line is left bare so the caller can prefix the round's index.
+    title_lines = wrap_text(track.name, title_width)
+    lines.append(title_lines[0])
     for continuation in title_lines[1:]:
         lines.append(f"    {continuation}")
 
     # Artists can be long too; wrap independently from title width.
-    artists_text = ", ".join(track["artists"])
-    artist_lines = textwrap.wrap(
-        artists_text,
-        width=artist_width,
-        break_long_words=False,
-        break_on_hyphens=False,
-    ) or [artists_text]
+    artist_lines = wrap_text(", ".join(track.artists), artist_width)
     for artist_line in artist_lines:
         lines.append(f"    {artist_line}")
 
-    return lines
+    return tuple(lines)
+
+
+def build_option_lines(index: int, track: Track, width: int) -> list[str]:
+    """Render one answer option as wrapped title/artist lines."""
+    body = build_option_body(track, width)
+    return [f"[{index}] {body[0]}", *body[1:]]
+
+
+def build_timer_line(remaining_seconds: int) -> str:
+    """Build the countdown line shown in the round header."""
+    return f"Time left: {remaining_seconds:02d}s"
 
 
 def build_round_lines(
     score: int,
     remaining_seconds: int,
     option_blocks: list[list[str]],
+    width: int,
 ) -> list[str]:
     """Build all lines shown for a round: header, options, and divider."""
-    width = get_terminal_width()
     divider = "=" * width
-    lines: list[str] = [
+    # One list display: header, each block followed by its blank spacer row, closing divider.
+    return [
         divider,
         f"Score: {score}",
-        f"Time left: {remaining_seconds:02d}s",
+        build_timer_line(remaining_seconds),
+        divider,
+        *(line for block in option_blocks for line in (*block, "")),
         divider,
     ]
 
-    for block in option_blocks:
-        lines.extend(block)
-        lines.append("")
-
-    lines.append(divider)
-    return lines
-
 
 def render_round_screen(
     score: int,
     remaining_seconds: int,
     option_blocks: list[list[str]],
     option_count: int,
+    width: int,
     answer_buffer: str = "",
 ) -> None:
     """Render the full round screen and prompt."""
-    lines = build_round_lines(score=score, remaining_seconds=remaining_seconds, option_blocks=option_blocks)
+    global _partial_redraw_state
+    lines = build_round_lines(
+        score=score,
+        remaining_seconds=remaining_seconds,
+        option_blocks=option_blocks,
+        width=width,
+    )
+
+    prompt = build_answer_prompt(option_count=option_count, answer_buffer=answer_buffer)
 
-    clear_terminal()
-    print("\n".join(lines))
-    sys.stdout.write(build_answer_prompt(option_count=option_count, answer_buffer=answer_buffer))
+    # Compose clear + screen + prompt into one buffer so each frame is a single write.
+    clear = CLEAR_SCREEN_SEQUENCE if _STDOUT_IS_TTY else ""
+    sys.stdout.write(clear + "\n".join(lines) + "\n" + prompt)
     sys.stdout.flush()
 
+    # Later updates may patch rows in place only if nothing scrolled or soft-wrapped. A row
+    # exactly as wide as the terminal does not wrap (the wrap is deferred until the next
+    # character, and a newline follows), so only the prompt row needs a spare column.
+    size = get_terminal_size()
+    fits_screen = (
+        len(lines) < size.lines
+        and max(display_width(line) for line in lines) <= size.columns
+        and display_width(prompt) < size.columns
+    )
+    _partial_redraw_state = (size, len(lines)) if _STDOUT_IS_TTY and fits_screen else None
+
 
 def update_round_timer(
     score: int,
     option_blocks: list[list[str]],
     option_count: int,
     remaining_seconds: int,
+    timer_line: str,
     answer_buffer: str,
+    width: int,
 ) -> None:
-    """Refresh countdown display by re-rendering the current round state."""
-    if not sys.stdout.isatty():
+    """Refresh countdown and prompt lines, redrawing fully only when needed."""
+    if not _STDOUT_IS_TTY:
         return
 
-    # Full redraw is robust across wrapped lines and variable terminal sizes.
-    render_round_screen(
-        score=score,
-        remaining_seconds=remaining_seconds,
-        option_blocks=option_blocks,
-        option_count=option_count,
-        answer_buffer=answer_buffer,
+    state = _partial_redraw_state
+    prompt = build_answer_prompt(option_count=option_count, answer_buffer=answer_buffer)
+    # Resized or unpatchable screen, or typed input grew the prompt past its row: full
+    # redraw is robust across wrapped lines.
+    if state is None or state[0] != get_terminal_size() or display_width(prompt) >= state[0].columns:
+        render_round_screen(
+            score=score,
+            remaining_seconds=remaining_seconds,
+            option_blocks=option_blocks,
+            option_count=option_count,
+            width=width,
+            answer_buffer=answer_buffer,
+        )
+        return
+
+    # Cursor sits at the end of the prompt row; hop up to the timer row and back.
+    rows_up = state[1] - TIMER_LINE_INDEX
+    sys.stdout.write(
+        f"\r\033[{rows_up}A\033[2K{timer_line}"
+        f"\r\033[{rows_up}B\033[2K{prompt}"
     )
+    sys.stdout.flush()
 
 
 def parse_choice(raw_value: str, option_count: int) -> tuple[int | None, str]:
@@ -183,10 +287,13 @@ def timed_choice_prompt(
     typed = ""
     deadline = time.monotonic() + timeout_seconds
     last_remaining = -1
+    # One registration reused by every wait (epoll/kqueue) instead of rebuilding fd sets.
+    selector = selectors.DefaultSelector()
 
     try:
         # cbreak mode reads single characters without waiting for Enter.
         tty.setcbreak(fd)
+        selector.register(fd, selectors.EVENT_READ)
 
         while True:
             # Recompute remaining time every loop iteration.
@@ -202,7 +309,7 @@ def timed_choice_prompt(
             # Poll stdin in short intervals to keep countdown responsive.
             wait_seconds = min(0.1, max(0.0, deadline - time.monotonic()))
             try:
-                ready, _, _ = select.select([sys.stdin], [], [], wait_seconds)
+                ready = selector.select(timeout=wait_seconds)
             except (OSError, ValueError):
                 print()
                 choice, status = parse_choice(
@@ -214,50 +321,59 @@ def timed_choice_prompt(
             if not ready:
                 continue
 
-            char = sys.stdin.read(1)
-            if char in ("\n", "\r"):
-                # Enter submits typed buffer; invalid values restart entry.
-                print()
-                choice, status = parse_choice(typed.strip().lower(), option_count)
-                if status == "invalid":
-                    typed = ""
-                    last_remaining = -1
-                    continue
-                return choice, status
-
-            if char in ("\x7f", "\b"):
-                typed = typed[:-1]
-                render_callback(remaining, typed)
-                continue
+            # Drain everything available in one read so pastes cost one syscall and one redraw.
+            chunk = os.read(fd, 64).decode("utf-8", errors="ignore")
+            needs_render = False
+            for char in chunk:
+                if char in SUBMIT_KEYS:
+                    # Enter submits typed buffer; invalid values restart entry.
+                    choice, status = parse_choice(typed.strip().lower(), option_count)
+                    if status == "invalid":
+                        # Stay on the prompt row so the in-place redraw lines up.
+                        typed = ""
+                        needs_render = True
+                        continue
+                    print()
+                    return choice, status
 
-            if char.lower() == "q":
-                print()
-                return None, "quit"
+                if char in BACKSPACE_KEYS:
+                    typed = typed[:-1]
+                    needs_render = True
+                    continue
 
-            if char.isdigit():
-                # Direct single-digit answer path for fast gameplay.
-                choice = int(char)
-                if 1 <= choice <= option_count:
+                if char in QUIT_KEYS:
                     print()
-                    return choice - 1, "answered"
-                typed += char
-                render_callback(remaining, typed)
-                continue
+                    return None, "quit"
+
+                if char in DIGIT_KEYS:
+                    # Direct single-digit answer path for fast gameplay.
+                    choice = int(char)
+                    if 1 <= choice <= option_count:
+                        print()
+                        return choice - 1, "answered"
+                    typed += char
+                    needs_render = True
+                    continue
 
-            if char == "\x1b":
-                # Drain escape sequence bytes from arrow/function keys.
-                while True:
-                    try:
-                        ready_more, _, _ = select.select([sys.stdin], [], [], 0.001)
-                    except (OSError, ValueError):
-                        break
-                    if not ready_more:
-                        break
-                    _ = sys.stdin.read(1)
-                continue
+                if char == "\x1b":
+                    # Arrow/function-key sequences arrive together; drop the rest of the chunk
+                    # and drain any trailing escape bytes still in flight.
+                    while True:
+                        try:
+                            ready_more = selector.select(timeout=0.001)
+                        except (OSError, ValueError):
+                            break
+                        if not ready_more:
+                            break
+                        _ = os.read(fd, 64)
+                    break
+
+            if needs_render:
+                render_callback(remaining, typed)
     finally:
         # Always restore terminal mode before returning.
         termios.tcsetattr(fd, termios.TCSADRAIN, old_attrs)
+        selector.close()
 
 
 def prompt_play_again() -> bool:
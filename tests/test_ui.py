@@ -0,0 +1,93 @@
+"""Terminal rendering checks that need a real pseudo-terminal."""
+
+import os
+import subprocess
+import sys
+import time
+import unittest
+from pathlib import Path
+
+try:
+    import pty
+except ImportError:
+    pty = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Renders one round frame at the game's own width, then two countdown ticks.
+ROUND_SCRIPT = """
+import sys
+
+from spotify_game.library import Track
+from spotify_game.ui import build_option_lines, get_terminal_width, render_round_screen, update_round_timer
+
+width = get_terminal_width()
+option_blocks = [
+    build_option_lines(index=i, track=Track(f"uri{i}", f"{sys.argv[1]} {i}", ("Artist",), 200000), width=width)
+    for i in range(1, 5)
+]
+render_round_screen(score=0, remaining_seconds=15, option_blocks=option_blocks, option_count=4, width=width)
+for seconds in (14, 13):
+    update_round_timer(
+        score=0,
+        option_blocks=option_blocks,
+        option_count=4,
+        remaining_seconds=seconds,
+        timer_line=f"Time left: {seconds:02d}s",
+        answer_buffer="",
+        width=width,
+    )
+"""
+
+
+def run_round_in_pty(columns: int, rows: int = 24, title: str = "Song") -> str:
+    """Run ROUND_SCRIPT with stdout on a pty of the given size and return its output."""
+    master_fd, slave_fd = pty.openpty()
+    env = {**os.environ, "COLUMNS": str(columns), "LINES": str(rows)}
+    try:
+        process = subprocess.Popen(
+            [sys.executable, "-c", ROUND_SCRIPT, title],
+            cwd=REPO_ROOT,
+            env=env,
+            stdout=slave_fd,
+            stderr=subprocess.PIPE,
+        )
+        os.close(slave_fd)
+        chunks: list[bytes] = []
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                chunk = os.read(master_fd, 65536)
+            except OSError:
+                # Linux raises EIO once the child closes its side of the pty.
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+        _, stderr = process.communicate(timeout=10)
+        if process.returncode:
+            raise AssertionError(stderr.decode())
+    finally:
+        os.close(master_fd)
+    return b"".join(chunks).decode()
+
+
+@unittest.skipIf(pty is None, "requires a POSIX pseudo-terminal")
+class PartialRedrawTests(unittest.TestCase):
+    def test_default_width_frame_patches_timer_in_place(self) -> None:
+        output = run_round_in_pty(columns=80)
+        self.assertEqual(output.count("\033[2J"), 1)
+        self.assertEqual(output.count("\033[2K"), 4)
+
+    def test_short_terminal_falls_back_to_full_redraw(self) -> None:
+        output = run_round_in_pty(columns=80, rows=10)
+        self.assertEqual(output.count("\033[2J"), 3)
+
+    def test_wide_characters_count_as_two_cells(self) -> None:
+        # 40 CJK characters fit 80 columns by code points but need 80+ cells.
+        output = run_round_in_pty(columns=80, title="\u6b4c" * 40)
+        self.assertEqual(output.count("\033[2J"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()